@@ -58,6 +58,7 @@ function run_error_tests {
     run_test "tests/test_error_scientific.mini" "output_err_scientific.txt" "科学计数法错误"
     run_test "tests/test_error_illegal_op.mini" "output_err_op.txt" "非法运算符"
     run_test "tests/test_errors.mini" "output_err_general.txt" "一般错误测试"
+    run_test "tests/test_error_unicode_numeric.mini" "output_err_unicode_num.txt" "Unicode 数字类字符开头"
 }
 
 # 边界条件测试
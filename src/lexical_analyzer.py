@@ -13,8 +13,13 @@
 7. 提供生成器模式按需产出 token
 """
 
+import mmap
+import re
 import sys
-from typing import List, Optional, Dict, Union, Tuple
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from functools import lru_cache
+from typing import Callable, List, NamedTuple, Optional, Dict, Union, Tuple
 from enum import IntEnum
 
 # TokenType 概览（按类别分组）：
@@ -61,25 +66,48 @@ class TokenType(IntEnum):
     DECREMENT = 32    # --
 
 
-class Token:
-    """词法单元，表示源代码中的一个记号。"""
+# 每个 Token 都会用到的 TokenType 成员缓存为模块级名字：IntEnum 的类属性访问要经过
+# 元类查找，比读取全局变量慢一个数量级；缓存的仍是枚举成员本身，Token.type 不受影响
+_IDENTIFIER = TokenType.IDENTIFIER
+_INTEGER = TokenType.INTEGER
+_FLOAT = TokenType.FLOAT
+_STRING = TokenType.STRING
 
-    def __init__(self, token_type: int, value: str, line: int, column: int, attr_index: int = -1):
-        self.type = token_type
-        self.value = value
-        self.line = line
-        self.column = column
-        self.attr_index = attr_index # 指向符号表/常数表索引，默认 -1
+
+class Token(NamedTuple):
+    """词法单元，表示源代码中的一个记号。
+    
+    以 5 元组 (type, value, line, column, attr_index) 存储，字段可按名访问；
+    相比带 __dict__ 的普通对象，每个 Token 只占一个元组的空间。
+    """
+    type: int
+    value: str
+    line: int
+    column: int
+    attr_index: int = -1  # 指向符号表/常数表索引，默认 -1
     
     def __repr__(self):
-        if self.attr_index >= 0:
-            return f"<{self.type}, '{self.value}', Line:{self.line}, Col:{self.column}, Index:{self.attr_index}>"
-        else:
-            return f"<{self.type}, '{self.value}', Line:{self.line}, Col:{self.column}>"
+        # 输出报告时每个 Token 都要格式化一次：一次元组解包代替 5 次字段属性访问；
+        # type 用 %d 直接按整数格式化，跳过 IntEnum 的 __format__
+        token_type, value, line, column, attr_index = self
+        if attr_index >= 0:
+            return "<%d, '%s', Line:%d, Col:%d, Index:%d>" % (token_type, value, line, column, attr_index)
+        # 关键字/运算符/EOF 的类型与值固定，使用预先填好这两项的模板，只格式化行列号
+        fixed = _FIXED_REPR.get(value)
+        if fixed is not None and fixed[0] is token_type:
+            return fixed[1] % (line, column)
+        return "<%d, '%s', Line:%d, Col:%d>" % (token_type, value, line, column)
+
+
+# 热路径上直接用 tuple.__new__ 构造 Token，跳过 NamedTuple 生成的 Python 层 __new__
+_new_token = tuple.__new__
+# 每个标识符都要调用一次，绑定为模块级名字省去 sys 模块的属性查找
+_intern = sys.intern
 
 
 class SymbolEntry:
     """符号表条目，记录标识符及其索引。"""
+    __slots__ = ('name', 'index')  # 不为每个条目分配 __dict__
 
     def __init__(self, name: str, index: int):
         self.name = name
@@ -91,6 +119,7 @@ class SymbolEntry:
 
 class ConstantEntry:
     """常数表条目，记录字面量值、索引及类型。"""
+    __slots__ = ('value', 'index', 'const_type')  # 不为每个条目分配 __dict__
 
     def __init__(self, value: Union[int, float, str], index: int, const_type: str = "int"):
         self.value = value
@@ -101,323 +130,435 @@ class ConstantEntry:
         return f"[{self.index}] {self.value} ({self.const_type})"
 
 
+# 词法表：语言定义固定不变，放在模块级由所有 LexicalAnalyzer 实例共享，
+# 不必每次构造分析器都重建字典。
+
+# 关键字表：扫描到对应单词时直接映射为关键字 Token
+KEYWORDS: Dict[str, TokenType] = {
+    'if': TokenType.IF,
+    'else': TokenType.ELSE,
+    'while': TokenType.WHILE,
+    'int': TokenType.INT,
+    'return': TokenType.RETURN
+}
+
+# 双字符运算符映射表，TOKEN_RE 中双字符分支排在单字符之前，保证最长匹配
+DOUBLE_CHAR_TOKENS: Dict[str, TokenType] = {
+    '==': TokenType.EQUAL,
+    '!=': TokenType.NOT_EQUAL,
+    '<=': TokenType.LESS_EQUAL,
+    '>=': TokenType.GREATER_EQUAL,
+    '&&': TokenType.AND,
+    '||': TokenType.OR,
+    '++': TokenType.INCREMENT,
+    '--': TokenType.DECREMENT
+}
+
+# 单字符运算符与界限符；'/' 与注释起始的区分由 TOKEN_RE 中 OP 分支的前瞻保证，
+# 到达这里的 '/' 一定是除号。
+SIMPLE_TOKENS: Dict[str, TokenType] = {
+    '(': TokenType.LEFT_PAREN,
+    ')': TokenType.RIGHT_PAREN,
+    '{': TokenType.LEFT_BRACE,
+    '}': TokenType.RIGHT_BRACE,
+    ';': TokenType.SEMICOLON,
+    ',': TokenType.COMMA,
+    '+': TokenType.PLUS,
+    '-': TokenType.MINUS,
+    '*': TokenType.MULTIPLY,
+    '/': TokenType.DIVIDE,
+    '=': TokenType.ASSIGN,
+    '<': TokenType.LESS,
+    '>': TokenType.GREATER,
+}
+
+# read_operator 使用的合并表：TOKEN_RE 的 OP 分支已按最长匹配切出整个运算符，
+# 单字符与双字符运算符的键互不重叠，合并后每个运算符只需一次字典查找
+OPERATOR_TOKENS: Dict[str, TokenType] = {**DOUBLE_CHAR_TOKENS, **SIMPLE_TOKENS}
+
+# 运算符词素 → (Token 类型, 规范化的值字符串)。Token 的 value 直接引用表中的键，
+# 所有同种运算符 Token 共享同一个 str 对象，不必为每次出现保留一份新切出的副本
+_OPERATOR_ENTRIES: Dict[str, Tuple[TokenType, str]] = {
+    lexeme: (token_type, lexeme) for lexeme, token_type in OPERATOR_TOKENS.items()
+}
+
+# 值 → (Token 类型, repr 模板)：关键字、运算符与 EOF 的类型和值都是固定的，
+# 模板中预先填好这两项，Token.__repr__ 只需格式化行列号；
+# 值中的 '%' 须转义为 '%%'（如将来加入取模运算符），否则模板本身就不是合法的格式串
+_FIXED_REPR: Dict[str, Tuple[TokenType, str]] = {
+    value: (token_type, "<%d, '%s', " % (token_type, value.replace('%', '%%')) + "Line:%d, Col:%d>")
+    for value, token_type in [*KEYWORDS.items(), *OPERATOR_TOKENS.items(), ('EOF', TokenType.EOF)]
+}
+
+
+# 主扫描正则：每个分支对应一类词素，re 在 C 层完成逐字符匹配，
+# Python 层只需按 m.lastgroup 分派处理函数。
+# - 词素前的空白和注释（行注释、已闭合的块注释）由开头的前缀一并吸收，
+#   不单独产生一次匹配；词素本身的起点用 m.start(m.lastgroup) 取得。
+#   注释以 '/' 开头，前缀中的注释分组只在遇到 '/' 时才会尝试。
+#   块注释体写成“展开循环”形式 [^*]*\*+(?:[^/*][^*]*\*+)*/：注释正文由单一字符类
+#   [^*]* 成段吞下，只在遇到 '*' 时才检查是否结束，比逐字符尝试 '*/' 的 .*?\*/ 快数倍。
+# - re 按顺序逐个尝试分支，相当于按首字符分派；因此分支按出现频率排列
+#   （运算符/界限符 > 标识符 > 数字 > 字符串 > 未闭合注释），常见词素少试几个分支。
+#   各分支首字符互不相交，顺序不影响结果；唯一的重叠是 '/'：能走到分支处的
+#   '//' 和已闭合的 '/*' 已被前缀吸收，OP 中的前瞻 (?![*/]) 把剩下的 '/*' 留给 BCOMMENT。
+# - 纯整数由 INTEGER 分支单独切出（后面不是数字、e/E 或“点+数字”），走 read_integer 快速路径；
+#   其余数字字面量（必然带小数部分或指数）落到 NUMBER 分支。
+# - NUMBER 的指数部分允许缺少数字（\d*），由 read_number 报告格式错误；
+# - STRING 允许缺少结束引号，未闭合的情况由 read_string 报错；
+# - BCOMMENT 只会匹配到未闭合的块注释（一直延伸到源码末尾），由 skip_block_comment 报错；
+# - ERROR 兜底匹配任意单个字符，保证 finditer 覆盖整个源码、不跳过非法字符；
+# - 末尾只剩空白或注释时由 EOF 分支吸收。
+TOKEN_RE = re.compile(r"""
+    [ \t\n\r]*(?:/(?:/[^\n]*|\*[^*]*\*+(?:[^/*][^*]*\*+)*/)[ \t\n\r]*)*
+    (?:
+        (?P<OP>==|!=|<=|>=|&&|\|\||\+\+|--|[-+*=<>(){};,]|/(?![*/]))
+      | (?P<ID>[^\W\d]\w*)
+      | (?P<INTEGER>\d+)(?![\deE]|\.\d)
+      | (?P<NUMBER>\d+(?:\.\d+)?(?:[eE][+-]?\d*)?)
+      | (?P<STRING>(?P<QUOTE>["'])(?:\\.?|(?!(?P=QUOTE))[^\\\n])*(?P<CLOSE>(?P=QUOTE))?)
+      | (?P<BCOMMENT>/\*.*)
+      | (?P<ERROR>.)
+      | (?P<EOF>\Z)
+    )
+""", re.VERBOSE | re.DOTALL)
+
+# 纯 ASCII 源码（Mini 程序的常见情况）使用的同一模式：re.ASCII 下 \w、\d 只查 ASCII 字符表，
+# 省去 Unicode 字符属性查询；对纯 ASCII 输入两者的匹配结果完全相同
+TOKEN_RE_ASCII = re.compile(TOKEN_RE.pattern, re.VERBOSE | re.DOTALL | re.ASCII)
+
+try:
+    _is_ascii = str.isascii  # Python 3.7+：C 层直接读取字符串的 ASCII 标记，O(1)
+except AttributeError:
+    def _is_ascii(text: str) -> bool:
+        """Python 3.6 兼容：UTF-8 编码长度等于字符数即为纯 ASCII。"""
+        return len(text.encode('utf-8', 'surrogatepass')) == len(text)
+
+NEWLINE_RE = re.compile(r'\n')
+TAB_RE = re.compile(r'\t')
+
+# 字符串常量中的转义字符映射
+ESCAPE_MAP = {'n': '\n', 't': '\t', 'r': '\r', '"': '"', "'": "'", '\\': '\\'}
+
+# 转义序列：反斜杠加任意一个字符；末尾孤立的反斜杠匹配为空序列
+ESCAPE_RE = re.compile(r'\\(.?)', re.DOTALL)
+
+
+def _unescape(m: 're.Match') -> str:
+    """ESCAPE_RE.sub 的替换函数：常见转义查表映射，其余字符原样保留，孤立反斜杠丢弃。"""
+    ch = m.group(1)
+    return ESCAPE_MAP.get(ch, ch)
+
+
 class LexicalAnalyzer:
     """Mini 语言词法分析器，负责扫描源代码并生成 token。"""
     MAX_ERRORS = 10
+    # 模块级词法表的别名：兼容通过实例访问 keywords 等属性的旧代码，所有实例共享同一字典
+    keywords = KEYWORDS
+    double_char_tokens = DOUBLE_CHAR_TOKENS
+    simple_tokens = SIMPLE_TOKENS
     
-    def __init__(self, source_code: str):
-        # 把整段源代码读入内存，准备进行顺序扫描
-        # pos 表示当前字符在字符串中的下标
-        # line/column 用来在报错时给出精确的行列位置
-        # current_char 始终指向“当前正在看的字符”，避免频繁索引 self.source
+    def __init__(self, source_code: str, on_error: Optional[Callable[[str], None]] = print,
+                 *, ascii_only: Optional[bool] = None):
+        """创建分析器：预先计算行首下标表并准备 TOKEN_RE 扫描迭代器。
+        
+        Args:
+            source_code: 待分析的源代码。
+            on_error: 每条错误提示产生时的回调，默认 print 立即输出到终端；
+                传入 None 则扫描期间不输出，错误只记录在 self.errors 中，
+                可在结束后由 print_errors() 统一输出。
+            ascii_only: 源码是否为纯 ASCII；缺省 (None) 时自动检测一次。
+                为 True 时使用 TOKEN_RE_ASCII 扫描，调用方须保证源码确实不含非 ASCII 字符。
+        """
+        self.on_error = on_error
+        # 把整段源代码读入内存，交给 TOKEN_RE.finditer 按词素切分
+        # pos 表示已扫描到的位置（下一个待匹配字符的下标）
+        # 行/列号不再逐字符维护，只在生成 Token 或报错时由 line_starts 反查
         self.source = source_code
         self.pos = 0
-        self.line = 1
-        self.column = 1
-        self.current_char = self.source[0] if source_code else None
+        # line_starts[i] 为第 i+1 行首字符的下标，用于二分查找行号
+        self.line_starts: List[int] = [0]
+        self.line_starts.extend(m.end() for m in NEWLINE_RE.finditer(source_code))
+        # tab_starts 为全部 Tab 字符的下标（升序），用于二分查找某位置之前最近的 Tab
+        self.tab_starts: List[int] = [m.start() for m in TAB_RE.finditer(source_code)]
         # Tab 宽度固定为 4，用于计算列号，采用制表位 (tab stop) 计算方式
         self.tab_width = 4
-        
-        # 关键字表：扫描到对应单词时直接映射为关键字 Token
-        self.keywords = {
-            'if': TokenType.IF,
-            'else': TokenType.ELSE,
-            'while': TokenType.WHILE,
-            'int': TokenType.INT,
-            'return': TokenType.RETURN
-        }
-        
-        # 双字符运算符映射表，采用最长匹配优先
-        self.double_char_tokens = {
-            '==': TokenType.EQUAL,
-            '!=': TokenType.NOT_EQUAL,
-            '<=': TokenType.LESS_EQUAL,
-            '>=': TokenType.GREATER_EQUAL,
-            '&&': TokenType.AND,
-            '||': TokenType.OR,
-            '++': TokenType.INCREMENT,
-            '--': TokenType.DECREMENT
-        }
-        
-        # 说明：'/' 不放入此表，因其既可能是除号也可能是注释起始，
-        # 统一在 get_next_token 中根据上下文（前瞻）进行特殊处理。
-        self.simple_tokens = {
-            '(': TokenType.LEFT_PAREN,
-            ')': TokenType.RIGHT_PAREN,
-            '{': TokenType.LEFT_BRACE,
-            '}': TokenType.RIGHT_BRACE,
-            ';': TokenType.SEMICOLON,
-            ',': TokenType.COMMA,
-            '*': TokenType.MULTIPLY,
+        self._tab_columns: Dict[int, int] = {}  # Tab 在 tab_starts 中的序号 -> 该 Tab 之后的列号
+        
+        # 纯 ASCII 源码走 TOKEN_RE_ASCII；检测结果保存在 ascii_only 中
+        self.ascii_only = _is_ascii(source_code) if ascii_only is None else ascii_only
+        self._pattern = TOKEN_RE_ASCII if self.ascii_only else TOKEN_RE
+        self._matches = self._pattern.finditer(source_code)
+        
+        # 分派表：TOKEN_RE 分组名 -> 处理函数；值为 None 的分组（末尾空白）直接跳过。
+        # 处理函数返回 Token，或返回 None 表示该词素不产生 Token（未闭合注释、非法字符）。
+        # 非 ASCII 源码中 ID 分支的首字符可能是非字母的数字类字符，需先经 read_unicode_identifier 检查
+        self._handlers = {
+            'EOF': None,
+            'BCOMMENT': self.skip_block_comment,
+            'ID': self.read_identifier if self.ascii_only else self.read_unicode_identifier,
+            'INTEGER': self.read_integer,
+            'NUMBER': self.read_number,
+            'STRING': self.read_string,
+            'OP': self.read_operator,
+            'ERROR': self.illegal_char,
         }
+        # 唯一的扫描生成器：get_next_token、tokenize、analyze 都从这里取 Token
+        self._token_iter = self._scan()
+        self._aborted = False  # 扫描是否因异常中断（中断后不再产出 EOF）
         
-        self.symbol_table: List[SymbolEntry] = []  # 顺序表：保存唯一标识符条目（索引即符号ID）
+        # 符号表/常数表按列存储（并行列表，下标即索引），扫描时不为每个条目创建对象；
+        # 需要条目对象时通过 symbol_table / constant_table 属性按需构造
+        self.symbol_names: List[str] = []          # 顺序表：保存唯一标识符（索引即符号ID）
         self.symbol_map: Dict[str, int] = {}       # name -> index 映射，用于去重/快速查找 O(1)
         
-        self.constant_table: List[ConstantEntry] = []  # 顺序表：保存唯一字面量（含类型）
-        self.constant_map: Dict[Tuple[str, Union[int, float, str]], int] = {}  # (type, value) -> index；区分 int 1 与 float 1.0
+        self.const_values: List[Union[int, float, str]] = []  # 顺序表：保存唯一字面量
+        self.const_types: List[str] = []                      # 与 const_values 并行：字面量类型
+        # 按类型分开的 value -> index 映射：int 1 与 float 1.0 落在不同字典中，互不混淆
+        self.constant_maps: Dict[str, Dict[Union[int, float, str], int]] = defaultdict(dict)
         
         self.tokens: List[Token] = []  # 若使用 analyze() 会填充完整 Token 列表；生成器模式可不使用
         self.errors: List[str] = []    # 扫描错误消息集合（最多记录 MAX_ERRORS 条提示）
     
-    def error(self, message: str):
-        """记录错误并尽量不中断扫描。
+    def locate(self, pos: int) -> Tuple[int, int]:
+        """把源码下标换算为 (行号, 列号)，均从 1 开始。
         
-        Args:
-            message: 错误描述文本。
-        Side Effects:
-            - 追加到 self.errors 并立即打印。
-            - 首次达到 MAX_ERRORS 时给出提示；为收集更多错误不抛出异常。
+        行号：在 line_starts 上二分查找。
+        列号：在 tab_starts 上二分查找 pos 之前最近的 Tab；它不在本行（或源码无 Tab）时直接相减，
+        否则从该 Tab 之后的列号起算。两次查找都是 O(log n)，与行长无关。
         """
-        # 统一的错误处理入口：
-        # 1. 把错误信息记录到 errors 列表，方便在末尾集中输出；
-        # 2. 立刻打印到终端，便于调试时第一时间看到问题；
-        # 3. 不直接抛异常，而是尽量继续往后扫描，收集更多错误信息。
-        error_msg = f"错误 (行 {self.line}, 列 {self.column}): {message}"
-        self.errors.append(error_msg)
-        print(error_msg)
-        
-        # 在错误数量第一次达到上限时给出提示，不中断后续分析
-        if len(self.errors) == self.MAX_ERRORS:
-            print(f"\n警告: 错误数量已达到 {self.MAX_ERRORS} 个，继续分析...")
-    
-    def advance(self):
-        """前进一个字符并维护精确行/列。
-        
-        行为：
-        - 遇 '\n'：line+1, column=1
-        - 遇 '\t'：按制表位对齐（见下方推导注释）
-        - 其他：column+1
-        Returns: None
+        line = bisect_right(self.line_starts, pos)
+        line_start = self.line_starts[line - 1]
+        tab_starts = self.tab_starts
+        if tab_starts:
+            k = bisect_left(tab_starts, pos) - 1
+            if k >= 0 and tab_starts[k] >= line_start:
+                return line, self.tab_column(line_start, k) + (pos - tab_starts[k] - 1)
+        return line, pos - line_start + 1
+    
+    def tab_column(self, line_start: int, k: int) -> int:
+        """返回 tab_starts[k] 处的制表符之后的列号。
+        
+        每个 Tab 只计算一次并缓存：从同一行内左侧最近一个已缓存的 Tab（或行首）出发，
+        依次推进到目标 Tab，两个 Tab 之间的普通字符各占一列。
         """
-        if self.current_char == '\n':
-            self.line += 1
-            self.column = 1
-        elif self.current_char == '\t':
+        tab_columns = self._tab_columns
+        column = tab_columns.get(k)
+        if column is not None:
+            return column
+        
+        tab_starts = self.tab_starts
+        first = k
+        while first > 0 and tab_starts[first - 1] >= line_start and (first - 1) not in tab_columns:
+            first -= 1
+        if first > 0 and tab_starts[first - 1] >= line_start:
+            prev, column = tab_starts[first - 1], tab_columns[first - 1]
+        else:
+            prev, column = line_start - 1, 1
+        
+        for i in range(first, k + 1):
+            tab = tab_starts[i]
+            column += tab - prev - 1
             # 计算下一个制表位 (Tab Stop)
             # 推导（1基列号 -> 0基对齐 -> 回到1基）：
             # 设 z = column - 1（0基），制表位在 0, w, 2w, ... 处（w=self.tab_width）。
             # 下一制表位的 0 基位置：next0 = ((z // w) + 1) * w（严格大于 z 的最小 w 的倍数）。
             # 需要前进的列数 Δ = next0 - z = w - (z % w) = w - ((column - 1) % w)。
             # 因此 1 基实现可用增量式：column += w - ((column - 1) % w)。
-            self.column += (self.tab_width - (self.column - 1) % self.tab_width)
-        else:
-            self.column += 1
-        
-        self.pos += 1
-        if self.pos < len(self.source):
-            self.current_char = self.source[self.pos]
-        else:
-            self.current_char = None
+            column += (self.tab_width - (column - 1) % self.tab_width)
+            tab_columns[i] = column
+            prev = tab
+        return column
     
-    def peek(self, offset: int = 1) -> Optional[str]:
-        """前瞻 offset 个字符但不消耗。
+    def error(self, message: str, pos: Optional[int] = None):
+        """记录错误并尽量不中断扫描。
         
         Args:
-            offset: 正偏移，默认 1。
-        Returns:
-            对应字符或 None（越界）。
+            message: 错误描述文本。
+            pos: 出错位置（源码下标），缺省为当前扫描位置 self.pos。
+        Side Effects:
+            - 追加到 self.errors；前 MAX_ERRORS 条同时交给 on_error 回调（默认立即打印）。
+            - 达到 MAX_ERRORS 时给出提示，之后的错误只记录不即时输出；为收集更多错误不抛出异常。
         """
-        peek_pos = self.pos + offset
-        if peek_pos < len(self.source):
-            return self.source[peek_pos]
-        return None
+        # 统一的错误处理入口：
+        # 1. 把错误信息记录到 errors 列表，方便在末尾集中输出；
+        # 2. 前 MAX_ERRORS 条交给 on_error 回调（默认立刻打印到终端，便于调试时第一时间看到问题），
+        #    其后只记录：垃圾输入可能产生海量错误，逐条打印会拖慢扫描，完整列表由 print_errors() 给出；
+        # 3. 不直接抛异常，而是尽量继续往后扫描，收集更多错误信息。
+        line, column = self.locate(self.pos if pos is None else pos)
+        error_msg = f"错误 (行 {line}, 列 {column}): {message}"
+        errors = self.errors
+        errors.append(error_msg)
+        
+        on_error = self.on_error
+        if on_error is not None and len(errors) <= self.MAX_ERRORS:
+            on_error(error_msg)
+            # 在错误数量达到上限时给出提示，不中断后续分析
+            if len(errors) == self.MAX_ERRORS:
+                on_error(f"\n警告: 错误数量已达到 {self.MAX_ERRORS} 个，后续错误将不再即时输出，继续分析...")
     
-    def skip_whitespace(self):
-        """跳过空白字符（空格/Tab/换行/回车）。
+    def skip_block_comment(self, m: 're.Match', line: int, column: int) -> None:
+        """报告未闭合的块注释（从 /* 一直到源码末尾）。
         
-        Returns: None
-        Side Effects: 指针移动到下一个非空白字符。
+        已闭合的块注释由 TOKEN_RE 的前缀直接跳过，不会到达这里；
+        注意 "/*/" 中的 '*' 不能同时充当开头和结尾，按未闭合处理。
         """
-        while self.current_char and self.current_char in ' \t\n\r':
-            self.advance()
+        self.error("未闭合的块注释", m.end())
+        return None
     
-    def skip_block_comment(self) -> bool:
-        """尝试跳过块注释 /* ... */。
-        
-        Returns:
-            True  已识别并跳过
-            False 非块注释起始或未闭合（未闭合会记录错误）
-        Side Effects: 更新位置；未闭合时调用 error()。
-        """
-        # 进入本函数时，当前字符是 '/'，需要再看一位确认是否为 '/*'
-        if self.current_char == '/' and self.peek() == '*':
-            # 先跳过起始符号 '/*'
-            self.advance()
-            self.advance()
-            
-            # 一直向前扫，直到遇到对应的 '*/' 或者文件结束
-            while self.current_char:
-                if self.current_char == '*' and self.peek() == '/':
-                    self.advance()
-                    self.advance()
-                    return True
-                self.advance()
-            
-            # 能走到这里说明文件结束前都没有遇到 '*/'
-            self.error("未闭合的块注释")
-            return False
-        return False
-    
-    def skip_line_comment(self) -> bool:
-        """尝试跳过 // 单行注释，直到并含换行。
-        
-        Returns: True 若当前是行注释起始，否则 False。
-        Side Effects: 前进至下一行起始。
-        """
-        if self.current_char == '/' and self.peek() == '/':
-            while self.current_char and self.current_char != '\n':
-                self.advance()
-            if self.current_char == '\n':
-                self.advance()
-            return True
-        return False
-    
-    def read_identifier(self) -> Token:
+    def read_identifier(self, m: 're.Match', line: int, column: int) -> Token:
         """读取标识符或关键字。
         
         Returns:
             若在关键字表中，返回对应关键字 Token；否则返回 IDENTIFIER，附符号表索引。
         """
-        start_line = self.line
-        start_column = self.column
-        result = ''
+        # 驻留 (intern) 标识符：同名标识符的所有 Token 共享同一个 str 对象，
+        # 不必为每次出现保留一份副本；symbol_map 查找时命中同一对象，按身份比较即可
+        result = _intern(m.group('ID'))
+        
+        # 一次 get 同时完成“是否关键字”的判断与取值（关键字表的键是字面量，本身已驻留）；
+        # 哈希已由 intern 计算并缓存在 str 对象上，后面的符号表查找直接复用
+        keyword = KEYWORDS.get(result)
+        if keyword is not None:
+            return _new_token(Token, (keyword, result, line, column, -1))
+        # 已登记的标识符（绝大多数出现）在这里直接查到索引，省去一次方法调用；
+        # 首次出现才交给 add_to_symbol_table 登记
+        index = self.symbol_map.get(result)
+        if index is None:
+            index = self.add_to_symbol_table(result)
+        return _new_token(Token, (_IDENTIFIER, result, line, column, index))
+    
+    def read_unicode_identifier(self, m: 're.Match', line: int, column: int) -> Optional[Token]:
+        """非 ASCII 源码的标识符入口：首字符须为字母或下划线。
         
-        while self.current_char and (self.current_char.isalnum() or self.current_char == '_'):
-            result += self.current_char
-            self.advance()
+        TOKEN_RE 的 [^\\W\\d] 除字母外还接受 '½'、'²'、'Ⅻ' 等非十进制数字字符；
+        首字符不是字母时按非法字符报告，并从下一个字符起重新扫描（其后的部分可能是标识符或数字）。
+        """
+        first = m.group('ID')[0]
+        if first.isalpha() or first == '_':
+            return self.read_identifier(m, line, column)
+        start = m.start('ID')
+        self.error(f"非法字符 '{first}'", start)
+        self.pos = start + 1
+        # 换上从下一个字符开始的新迭代器，_scan 检测到后改从这里继续
+        self._matches = self._pattern.finditer(self.source, start + 1)
+        return None
+    
+    def read_integer(self, m: 're.Match', line: int, column: int) -> Token:
+        """读取纯整数字面量（快速路径）。
         
-        if result in self.keywords:
-            return Token(self.keywords[result], result, start_line, start_column)
-        else:
-            index = self.add_to_symbol_table(result)
-            return Token(TokenType.IDENTIFIER, result, start_line, start_column, index)
+        TOKEN_RE 的 INTEGER 分支已保证词素后面没有小数部分或指数，
+        无需再检查 '.'、'e'/'E'，直接转换并登记到常数表。
+        """
+        result = m.group('INTEGER')
+        index = self.add_to_constant_table(int(result), "int")
+        return _new_token(Token, (_INTEGER, result, line, column, index))
     
-    def read_number(self) -> Token:
-        """读取整数/小数/科学计数法字面量。
+    def read_number(self, m: 're.Match', line: int, column: int) -> Token:
+        """读取小数/科学计数法字面量。
         
         规则：
         - 小数点至多 1 个；点后必须有数字（例如 "1." 不视为浮点，点保留给后续处理）。
         - 可选指数 e/E，后接可选 +/- 与至少一位数字。
         语言规范：不允许“尾点小数”（如 1.），需要写作 1.0。
         
+        纯整数已由 TOKEN_RE 的 INTEGER 分支切出并交给 read_integer，
+        因此到达这里的词素必然带有小数部分或指数，一定是浮点数，无需再判断类型。
+        
         Returns:
-            INTEGER 或 FLOAT；指数格式错误时仍返回 FLOAT，attr_index=-1，并记录错误。
+            FLOAT；指数格式错误时 attr_index=-1，并记录错误。
         """
-        # 整数、小数和科学计数法统一在这里处理
-        # start_line/start_column 用来在出错时给出准确位置
-        start_line = self.line
-        start_column = self.column
-        result = ''
-        is_float = False
-        
-        # 读取整数部分和小数部分
-        # 规则：
-        # - 允许至多一个小数点；第二次遇到 '.' 直接停止数字读取（交给后续逻辑处理）。
-        # - 点后必须有数字；否则不把 '.' 吸收（例如 "1." 会在此处停止为 "1"，
-        #   后续把 '.' 当作单独字符处理），以避免错误的浮点格式。
-        while self.current_char and (self.current_char.isdigit() or self.current_char == '.'):
-            if self.current_char == '.':
-                if is_float:
-                    break
-                if not self.peek() or not self.peek().isdigit():
-                    break
-                is_float = True
-            result += self.current_char
-            self.advance()
-        
-        # 处理科学计数法指数部分 (e 或 E)，例如 1.23e-4 或 3E+8
-        if self.current_char and self.current_char.lower() == 'e':
-            result += self.current_char
-            self.advance()
-            
-            # 处理指数符号 (+/-)
-            if self.current_char and self.current_char in '+-':
-                result += self.current_char
-                self.advance()
-            
-            # 指数后面必须跟数字
-            if not self.current_char or not self.current_char.isdigit():
-                self.error("科学计数法格式错误: 指数后缺少数字")
-                return Token(TokenType.FLOAT, result, start_line, start_column, -1)
-            
-            # 读取指数数字部分
-            while self.current_char and self.current_char.isdigit():
-                result += self.current_char
-                self.advance()
-            
-            is_float = True  # 只要有 'e'，一定是浮点数
-        
-        # 存入常数表：浮点和整数分别记录类型，后续可按类型做不同处理
-        if is_float:
-            try:
-                value = float(result)
-                index = self.add_to_constant_table(value, "float")
-                return Token(TokenType.FLOAT, result, start_line, start_column, index)
-            except ValueError:
-                self.error(f"无效的浮点数格式: {result}")
-                return Token(TokenType.FLOAT, result, start_line, start_column, -1)
-        else:
-            value = int(result)
-            index = self.add_to_constant_table(value, "int")
-            return Token(TokenType.INTEGER, result, start_line, start_column, index)
+        result = m.group('NUMBER')
+        
+        # 科学计数法指数部分 (e 或 E)，例如 1.23e-4 或 3E+8；指数后面必须跟数字：
+        # NUMBER 分支的结尾只可能是数字或 e/E/+/-，因此用固定字符集判断即可，
+        # 不需要 Unicode 感知的 isdigit()
+        if result[-1] in 'eE+-':
+            self.error("科学计数法格式错误: 指数后缺少数字", m.end())
+            return _new_token(Token, (_FLOAT, result, line, column, -1))
+        
+        try:
+            value = float(result)
+        except ValueError:
+            self.error(f"无效的浮点数格式: {result}", m.end())
+            return _new_token(Token, (_FLOAT, result, line, column, -1))
+        index = self.add_to_constant_table(value, "float")
+        return _new_token(Token, (_FLOAT, result, line, column, index))
     
-    def read_string(self) -> Token:
+    def read_string(self, m: 're.Match', line: int, column: int) -> Token:
         r"""读取字符串字面量（支持 ' 与 ").
         
-        支持转义：\n, \t, \r, \", \, \\。
-        错误：未闭合时会在发生位置与函数结束处各报一次，便于定位。
+        支持转义：\n, \t, \r, \", \', \\。
+        错误：遇换行未闭合时会报两次（与旧实现保持一致，便于定位）；到文件末尾未闭合报一次。
         
         Returns: STRING（带常数表索引）。
         """
-        start_line = self.line
-        start_column = self.column
-        quote_char = self.current_char
-        self.advance()
-        
-        result = ''
-        while self.current_char and self.current_char != quote_char:
-            if self.current_char == '\n':
-                # 遇到换行说明引号没有闭合：
-                # 这里先报错并终止本字符串读取；循环之后若未见闭合引号，
-                # 还会再次报错一次，这样做可以在错误位置和结束位置都给出提示，
-                # 便于定位（必要时可改为仅一次提示）。
-                self.error(f"字符串常量未闭合")
-                break
-            
-            if self.current_char == '\\':
-                self.advance()
-                if self.current_char in 'ntr"\'\\':
-                    # 常见转义字符映射
-                    escape_map = {'n': '\n', 't': '\t', 'r': '\r', '"': '"', "'": "'", '\\': '\\'}
-                    result += escape_map.get(self.current_char, self.current_char)
-                    self.advance()
-                else:
-                    result += self.current_char
-                    self.advance()
-            else:
-                result += self.current_char
-                self.advance()
-        
-        if self.current_char == quote_char:
-            self.advance()
+        start = m.start('STRING')
+        end = m.end()
+        closed = m.group('CLOSE') is not None
+        raw = self.source[start + 1:end - 1 if closed else end]
+        
+        if '\\' not in raw:
+            # 常见情况：没有转义，字符串值就是源码切片本身
+            result = raw
         else:
+            # 有转义时由 ESCAPE_RE.sub 一次扫描完成，Python 层只在每个转义处调用一次 _unescape
+            result = ESCAPE_RE.sub(_unescape, raw)
+        
+        if not closed:
+            if end < len(self.source):
+                # 停在换行处说明引号没有闭合：在错误位置给出两次提示，
+                # 与旧实现（循环内一次、循环后一次）的输出保持一致
+                self.error(f"字符串常量未闭合", end)
             # 扫描结束仍未遇到结束引号
-            self.error(f"字符串常量未闭合")
+            self.error(f"字符串常量未闭合", end)
         
         index = self.add_to_constant_table(result, "string")
-        return Token(TokenType.STRING, result, start_line, start_column, index)
+        return _new_token(Token, (_STRING, result, line, column, index))
+    
+    def read_operator(self, m: 're.Match', line: int, column: int) -> Token:
+        """读取运算符或界限符；双字符运算符已由 TOKEN_RE 按最长匹配切出。"""
+        token_type, result = _OPERATOR_ENTRIES[m.group('OP')]
+        return _new_token(Token, (token_type, result, line, column, -1))
+    
+    def illegal_char(self, m: 're.Match', line: int, column: int) -> None:
+        """报告非法字符并跳过。
+        
+        单独的 '!'、'&'、'|' 按语言定义视为错误，并提示应为 '!='、'&&'、'||'，
+        以帮助使用者快速定位问题。
+        """
+        ch = m.group('ERROR')
+        pos = m.start('ERROR')
+        if ch == '!':
+            self.error(f"非法字符 '!'，期望 '!='", pos)
+        elif ch in '&|':
+            self.error(f"非法字符 '{ch}'，期望 '{ch}{ch}'", pos)
+        else:
+            self.error(f"非法字符 '{ch}'", pos)
+        return None
+    
+    @property
+    def symbol_table(self) -> List[SymbolEntry]:
+        """符号表条目列表（由 symbol_names 按需构造）。"""
+        return [SymbolEntry(name, index) for index, name in enumerate(self.symbol_names)]
+    
+    @property
+    def constant_table(self) -> List[ConstantEntry]:
+        """常数表条目列表（由 const_values / const_types 按需构造）。"""
+        return [ConstantEntry(value, index, const_type)
+                for index, (value, const_type) in enumerate(zip(self.const_values, self.const_types))]
     
     def add_to_symbol_table(self, name: str) -> int:
         """符号表去重，返回索引。
         
         语法阶段可仅保存整数索引，无需重复存储完整标识符字符串。
         """
-        if name in self.symbol_map:
-            return self.symbol_map[name]
+        index = self.symbol_map.get(name)
+        if index is not None:
+            return index
         
-        index = len(self.symbol_table)
-        self.symbol_table.append(SymbolEntry(name, index))
+        index = len(self.symbol_names)
+        self.symbol_names.append(name)
         self.symbol_map[name] = index
         return index
     
@@ -425,123 +566,84 @@ class LexicalAnalyzer:
         """常数表去重并返回索引。
         
         相同“类型+值”的字面量只保留一份以节省空间；
-        通过使用 (const_type, value) 作为键，严格区分 int 1 与 float 1.0。
+        每种类型使用独立的字典，严格区分 int 1 与 float 1.0，且无需为每次查找构造元组键。
         """
-        key: Tuple[str, Union[int, float, str]] = (const_type, value)
-        if key in self.constant_map:
-            return self.constant_map[key]
-        
-        index = len(self.constant_table)
-        self.constant_table.append(ConstantEntry(value, index, const_type))
-        self.constant_map[key] = index
+        type_map = self.constant_maps[const_type]
+        index = type_map.get(value)
+        if index is not None:
+            return index
+        
+        index = len(self.const_values)
+        self.const_values.append(value)
+        self.const_types.append(const_type)
+        type_map[value] = index
         return index
     
     def get_next_token(self) -> Optional[Token]:
-        """返回下一个 Token（主扫描循环）。
+        """返回下一个 Token。
         
-        流程：跳空白/注释 → 标识符/数字/字符串 → 双字符运算符（最长匹配）→ 单字符 → 错误恢复。
+        与 tokenize()/analyze() 共用同一个扫描生成器 _scan()，逐次从中取出一个 Token；
+        源码扫描完毕（或扫描中断）后每次调用都返回 EOF。
         Returns: 下一个 Token；源尽时返回 EOF。
         Side Effects: 可能记录错误并继续扫描。
         """
-        # 主扫描循环，根据当前字符生成下一个记号：
-        # 1. 先跳过空白和注释；
-        # 2. 再根据首字符判断是标识符、数字、字符串还是运算符/分隔符；
-        # 3. 每次调用最多前进到下一个 Token 边界，或者在遇到非法字符时尝试报错并恢复。
-        while self.current_char:
-            if self.current_char in ' \t\n\r':
-                self.skip_whitespace()
-                continue
-            
-            if self.current_char == '/' and self.peek() == '*':
-                self.skip_block_comment()
-                continue
-            
-            if self.current_char == '/' and self.peek() == '/':
-                self.skip_line_comment()
-                continue
-            
-            if self.current_char.isalpha() or self.current_char == '_':
-                return self.read_identifier()
-            
-            if self.current_char.isdigit():
-                return self.read_number()
-            
-            if self.current_char in '"\'':
-                return self.read_string()
-            
-            start_line = self.line
-            start_column = self.column
-            
-            # 统一处理双字符运算符（最长匹配原则）：
-            # 先尝试两个字符的组合（== != <= >= && || ++ --），若匹配则消费两字符；
-            # 否则回退到单字符分支；对于单独的 '!'、'&'、'|'，按语言定义视为错误并提示
-            # 应为 '!='、'&&'、'||'，以帮助使用者快速定位问题。
-            if self.current_char in '=!<>&|+-':
-                peek_char = self.peek()
-                if peek_char:
-                    candidate = self.current_char + peek_char
-                    if candidate in self.double_char_tokens:
-                        self.advance()
-                        self.advance()
-                        return Token(self.double_char_tokens[candidate], candidate, start_line, start_column)
-                
-                # 单字符处理
-                if self.current_char == '=':
-                    self.advance()
-                    return Token(TokenType.ASSIGN, '=', start_line, start_column)
-                elif self.current_char == '<':
-                    self.advance()
-                    return Token(TokenType.LESS, '<', start_line, start_column)
-                elif self.current_char == '>':
-                    self.advance()
-                    return Token(TokenType.GREATER, '>', start_line, start_column)
-                elif self.current_char == '+':
-                    self.advance()
-                    return Token(TokenType.PLUS, '+', start_line, start_column)
-                elif self.current_char == '-':
-                    self.advance()
-                    return Token(TokenType.MINUS, '-', start_line, start_column)
-                elif self.current_char == '!':
-                    self.error(f"非法字符 '!'，期望 '!='")
-                    self.advance()
-                    continue
-                elif self.current_char in '&|':
-                    self.error(f"非法字符 '{self.current_char}'，期望 '{self.current_char}{self.current_char}'")
-                    self.advance()
-                    continue
-            
-            if self.current_char in self.simple_tokens:
-                token_type = self.simple_tokens[self.current_char]
-                val = self.current_char
-                self.advance()
-                return Token(token_type, val, start_line, start_column)
-            
-            if self.current_char == '/':
-                self.advance()
-                return Token(TokenType.DIVIDE, '/', start_line, start_column)
-            
-            self.error(f"非法字符 '{self.current_char}'")
-            self.advance()
-        
-        return Token(TokenType.EOF, 'EOF', self.line, self.column)
+        token = next(self._token_iter, None)
+        if token is None:
+            return self._eof_token()
+        return token
     
     def tokenize(self):
         """按需产出 Token 的生成器。
         
-        Yields: Token（包含 EOF）。
-        Side Effects: 调用 get_next_token()，可能记录错误。
+        Yields: Token（包含 EOF；扫描中断时不产出 EOF，中断原因记入 self.errors）。
+        Side Effects: 可能记录错误。
+        
+        直接转发共享的扫描生成器 _scan()，与 get_next_token 交替调用时互不重复、互不遗漏。
+        """
+        yield from self._token_iter
+        if not self._aborted:
+            yield self._eof_token()
+    
+    def _eof_token(self) -> Token:
+        """构造位于源码末尾的 EOF Token。"""
+        self.pos = len(self.source)
+        line, column = self.locate(self.pos)
+        return Token(TokenType.EOF, 'EOF', line, column)
+    
+    def _scan(self):
+        """主扫描循环（唯一的一份），产出除 EOF 以外的全部 Token。
+        
+        流程：从 TOKEN_RE.finditer 取下一个词素 → 按分组名分派处理函数 →
+        空白/注释/非法字符不产生 Token，继续取下一个。
+        新的词法规则在 TOKEN_RE 中加分支、在 _handlers 中登记处理函数即可，
+        get_next_token、tokenize、analyze 都经由这里。
         """
+        handlers = self._handlers
+        locate = self.locate
         try:
             while True:
-                token = self.get_next_token()
-                if token:
-                    yield token
-                    if token.type == TokenType.EOF:
-                        break
+                matches = self._matches
+                for m in matches:
+                    kind = m.lastgroup
+                    handler = handlers[kind]
+                    if handler is None:
+                        continue
+                    self.pos = m.end()
+                    line, column = locate(m.start(kind))
+                    token = handler(m, line, column)
+                    if token is not None:
+                        yield token
+                    elif self._matches is not matches:
+                        break  # 处理函数换了迭代器：从新的位置重新扫描
                 else:
                     break
         except Exception as e:
-            print(f"\n分析中断: {e}")
+            # 中断也记入 errors，静默模式（on_error=None）下调用方同样能从结果中看到扫描未完成
+            self._aborted = True
+            message = f"分析中断: {e}"
+            self.errors.append(message)
+            if self.on_error is not None:
+                self.on_error(f"\n{message}")
     
     def analyze(self) -> List[Token]:
         """一次性收集全部 Token。
@@ -554,20 +656,27 @@ class LexicalAnalyzer:
     
     def print_tokens(self):
         """在终端打印已扫描 Token 列表（含序号）。"""
+        self._print_token_lines(self._token_lines())
+    
+    def _token_lines(self) -> List[str]:
+        """Token 列表各行的输出文本（带序号，不含换行）；终端与文件输出共用同一格式。"""
+        return [f"{i:3d}. {token}" for i, token in enumerate(self.tokens, 1)]
+    
+    def _print_token_lines(self, token_lines: List[str]):
+        """打印 Token 序列部分：各行先拼接成一个字符串再一次性 print，避免每个 Token 一次 print 调用。"""
         print("\n" + "="*60)
         print("Token 序列:")
         print("="*60)
-        for i, token in enumerate(self.tokens, 1):
-            print(f"{i:3d}. {token}")
+        if token_lines:
+            print("\n".join(token_lines))
     
     def print_symbol_table(self):
         """在终端打印符号表（索引与标识符）。"""
         print("\n" + "="*60)
         print("符号表 (标识符):")
         print("="*60)
-        if self.symbol_table:
-            for entry in self.symbol_table:
-                print(f"  {entry}")
+        if self.symbol_names:
+            print("\n".join(self._symbol_lines()))
         else:
             print("  (空)")
     
@@ -576,9 +685,8 @@ class LexicalAnalyzer:
         print("\n" + "="*60)
         print("常数表:")
         print("="*60)
-        if self.constant_table:
-            for entry in self.constant_table:
-                print(f"  {entry}")
+        if self.const_values:
+            print("\n".join(self._constant_lines()))
         else:
             print("  (空)")
     
@@ -588,8 +696,7 @@ class LexicalAnalyzer:
             print("\n" + "="*60)
             print("错误列表:")
             print("="*60)
-            for error in self.errors:
-                print(f"  {error}")
+            print("\n".join([f"  {error}" for error in self.errors]))
     
     def save_tokens_to_file(self, filename: str):
         """将 Token、符号表、常数表与错误列表写入文本文件。
@@ -599,37 +706,149 @@ class LexicalAnalyzer:
         - 符号表 (标识符)
         - 常数表
         - 错误列表（如有）
+        
+        全部内容先收集到列表 parts 中，最后拼接成一个字符串一次写入文件。
+        """
+        self._write_report(filename, self._token_lines())
+    
+    def _write_report(self, filename: str, token_lines: List[str]):
+        """按 save_tokens_to_file 的格式写文件，Token 部分使用已格式化好的各行。"""
+        parts: List[str] = []
+        parts.append("Token序列\n")
+        parts.append("="*60 + "\n")
+        if token_lines:
+            parts.append("\n".join(token_lines))
+            parts.append("\n")
+        parts.extend(self._table_sections())
+        
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.write("".join(parts))
+    
+    def analyze_print_save(self, filename: str) -> List[Token]:
+        """命令行的完整流程：分析 → 打印 Token/符号表/常数表/错误 → 保存到文件。
+        
+        输出与依次调用 analyze()、print_tokens()、print_symbol_table()、print_constant_table()、
+        print_errors()、save_tokens_to_file() 完全相同，但每个 Token 只格式化一次，
+        终端与文件共用同一批文本行（Token 的格式化是输出阶段的主要开销）。
+        
+        Returns: List[Token]（同 analyze()）。
         """
+        self.analyze()
+        token_lines = self._token_lines()
+        self._print_token_lines(token_lines)
+        self.print_symbol_table()
+        self.print_constant_table()
+        self.print_errors()
+        self._write_report(filename, token_lines)
+        return self.tokens
+    
+    def analyze_to_file(self, filename: str, chunk_lines: int = 4096) -> int:
+        """边扫描边把结果写入文件，不在内存中保留完整的 Token 列表。
+        
+        输出格式与 analyze() + save_tokens_to_file() 完全相同，适合大文件：
+        Token 行每攒满 chunk_lines 行拼接写入一次，内存占用与 Token 总数无关。
+        注意 self.tokens 不会被填充，需要 Token 列表时仍应使用 analyze()。
+        
+        Returns: 写入的 Token 数（含 EOF）。
+        """
+        count = 0
         with open(filename, 'w', encoding='utf-8') as f:
-            f.write("Token序列\n")
-            f.write("="*60 + "\n")
-            for i, token in enumerate(self.tokens, 1):
-                f.write(f"{i:3d}. {token}\n")
-            
-            f.write("\n" + "="*60 + "\n")
-            f.write("符号表 (标识符)\n")
-            f.write("="*60 + "\n")
-            if self.symbol_table:
-                for entry in self.symbol_table:
-                    f.write(f"  {entry}\n")
-            else:
-                f.write("  (空)\n")
-            
-            f.write("\n" + "="*60 + "\n")
-            f.write("常数表\n")
-            f.write("="*60 + "\n")
-            if self.constant_table:
-                for entry in self.constant_table:
-                    f.write(f"  {entry}\n")
-            else:
-                f.write("  (空)\n")
-            
-            if self.errors:
-                f.write("\n" + "="*60 + "\n")
-                f.write("错误列表\n")
-                f.write("="*60 + "\n")
-                for error in self.errors:
-                    f.write(f"  {error}\n")
+            f.write("Token序列\n" + "="*60 + "\n")
+            lines: List[str] = []
+            for count, token in enumerate(self.tokenize(), 1):
+                lines.append(f"{count:3d}. {token}\n")
+                if len(lines) >= chunk_lines:
+                    f.write("".join(lines))
+                    lines = []
+            f.write("".join(lines))
+            # 符号表、常数表和错误列表在扫描结束后才完整
+            f.write("".join(self._table_sections()))
+        return count
+    
+    def _symbol_lines(self) -> List[str]:
+        """符号表各行的输出文本（不含换行）。
+        
+        直接由 symbol_names 格式化，格式与 SymbolEntry.__repr__ 一致，不构造条目对象。
+        """
+        return [f"  [{index}] {name}" for index, name in enumerate(self.symbol_names)]
+    
+    def _constant_lines(self) -> List[str]:
+        """常数表各行的输出文本（不含换行）。
+        
+        直接由 const_values / const_types 格式化，格式与 ConstantEntry.__repr__ 一致，不构造条目对象。
+        """
+        return [f"  [{index}] {value} ({const_type})"
+                for index, (value, const_type) in enumerate(zip(self.const_values, self.const_types))]
+    
+    def _table_sections(self) -> List[str]:
+        """符号表、常数表与错误列表（如有）三部分的文件输出文本，每项以换行结尾。"""
+        parts: List[str] = []
+        parts.append("\n" + "="*60 + "\n")
+        parts.append("符号表 (标识符)\n")
+        parts.append("="*60 + "\n")
+        if self.symbol_names:
+            parts.extend([line + "\n" for line in self._symbol_lines()])
+        else:
+            parts.append("  (空)\n")
+        
+        parts.append("\n" + "="*60 + "\n")
+        parts.append("常数表\n")
+        parts.append("="*60 + "\n")
+        if self.const_values:
+            parts.extend([line + "\n" for line in self._constant_lines()])
+        else:
+            parts.append("  (空)\n")
+        
+        if self.errors:
+            parts.append("\n" + "="*60 + "\n")
+            parts.append("错误列表\n")
+            parts.append("="*60 + "\n")
+            parts.extend([f"  {error}\n" for error in self.errors])
+        return parts
+
+
+class TokenizeResult(NamedTuple):
+    """tokenize_cached 的结果：各部分均为不可变元组，可在多个调用方之间安全共享。"""
+    tokens: Tuple[Token, ...]
+    symbol_names: Tuple[str, ...]
+    constants: Tuple[Tuple[Union[int, float, str], str], ...]  # (值, 类型)，下标即常数表索引
+    errors: Tuple[str, ...]
+
+
+@lru_cache(maxsize=32)
+def tokenize_cached(source_code: str) -> TokenizeResult:
+    """对同一段源码的重复分析做记忆化，适合测试或语法分析器反复对同一输入调用词法分析的场景。
+    
+    扫描期间不输出错误（on_error=None），错误文本随结果一并返回；
+    扫描异常中断时 tokens 不含 EOF，errors 末尾为“分析中断: ...”记录。
+    Token 是不可变的命名元组，缓存的结果可以直接共享，无需复制。
+    最多缓存最近 32 段不同的源码。
+    """
+    analyzer = LexicalAnalyzer(source_code, on_error=None)
+    analyzer.analyze()
+    return TokenizeResult(tuple(analyzer.tokens),
+                          tuple(analyzer.symbol_names),
+                          tuple(zip(analyzer.const_values, analyzer.const_types)),
+                          tuple(analyzer.errors))
+
+
+def _read_source(path: str) -> str:
+    """以 UTF-8 读取源文件，换行规则与文本模式 open() 相同（\\r\\n 与单独的 \\r 都转为 \\n）。
+    
+    文件经 mmap 映射后直接解码成 str，不再像 f.read() 那样先读出一份完整的 bytes 副本，
+    大文件的峰值内存约减半。空文件、管道等无法映射的输入退回普通 read()。
+    """
+    with open(path, 'rb') as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            text = f.read().decode('utf-8')
+        else:
+            with mapped:
+                text = str(mapped, 'utf-8')
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
 
 
 def main():
@@ -647,9 +866,8 @@ def main():
     output_file = sys.argv[2] if len(sys.argv) > 2 else "tokens_output.txt"
     
     try:
-        # 以 UTF-8 编码读取整个源文件内容
-        with open(input_file, 'r', encoding='utf-8') as f:
-            source_code = f.read()
+        # 以 UTF-8 编码读取整个源文件内容（经 mmap 映射，见 _read_source）
+        source_code = _read_source(input_file)
     except FileNotFoundError:
         print(f"错误: 找不到文件 '{input_file}'")
         return
@@ -661,14 +879,8 @@ def main():
     print("="*60)
     
     analyzer = LexicalAnalyzer(source_code)
-    analyzer.analyze()
-    
-    analyzer.print_tokens()
-    analyzer.print_symbol_table()
-    analyzer.print_constant_table()
-    analyzer.print_errors()
-    
-    analyzer.save_tokens_to_file(output_file)
+    # 分析、打印并保存；每个 Token 只格式化一次，终端与文件共用
+    analyzer.analyze_print_save(output_file)
     print(f"\n结果已保存到: {output_file}")
     print("输出文件结构: Token序列 / 符号表(标识符) / 常数表 / 错误列表(可选)")
     